@@ -1,5 +1,7 @@
 import sys
 
+from collections import deque
+
 from crossword import *
 
 
@@ -10,11 +12,77 @@ class CrosswordCreator():
         Create new CSP crossword generate.
         """
         self.crossword = crossword
+
+        # every word gets a number, and a set of words is stored as a bitset:
+        # an int whose bit k is set when words[k] is in the set
+        self.words = sorted(self.crossword.words)
+        self.numbers = dict()
+        index = dict()
+        lengths = dict()
+        for k, word in enumerate(self.words):
+            self.numbers[word] = k
+            lengths.setdefault(len(word), []).append(k)
+            # index[length, position, letter] is the set of words with that
+            # length that have that letter at that position
+            for position, letter in enumerate(word):
+                index.setdefault((len(word), position, letter), []).append(k)
+
+        # turn the lists of word numbers into bitsets, each one built only once
+        self.index = {key: self.bitset(numbers) for key, numbers in index.items()}
+        self.lengths = {length: self.bitset(numbers) for length, numbers in lengths.items()}
+        self.letters = sorted(set(letter for (_, _, letter) in self.index))
+
         self.domains = {
-            var: self.crossword.words.copy()
+            var: (1 << len(self.words)) - 1
+            for var in self.crossword.variables
+        }
+        self.neighbors = {
+            var: self.crossword.neighbors(var)
             for var in self.crossword.variables
         }
 
+        # domains as they were before each change made during the search, as
+        # (variable, old domain) pairs, so the changes can be undone when backtracking
+        self.trail = []
+
+        # how many times a domain was revised, how many words were removed,
+        # and how many assignments the search tried
+        self.revisions = 0
+        self.removed = 0
+        self.nodes = 0
+
+    def bitset(self, numbers):
+        """
+        Return the bitset of the words numbered `numbers`.
+        """
+        bits = bytearray((len(self.words) + 7) // 8)
+        for k in numbers:
+            bits[k >> 3] |= 1 << (k & 7)
+        return int.from_bytes(bits, "little")
+
+    def restrict(self, var, domain):
+        """
+        Replace the domain of `var` with `domain`, a subset of it, saving the
+        old domain on the trail.
+        """
+        self.trail.append((var, self.domains[var]))
+        self.domains[var] = domain
+
+    def undo(self, mark):
+        """
+        Restore the domains changed since the trail had `mark` entries.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            self.domains[var] = domain
+
+    def domain_words(self, var):
+        """
+        Return the list of words in the domain of `var`.
+        """
+        bits = bin(self.domains[var])[:1:-1]
+        return [self.words[k] for k, bit in enumerate(bits) if bit == "1"]
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -90,7 +158,10 @@ class CrosswordCreator():
         Enforce node and arc consistency, and then solve the CSP.
         """
         self.enforce_node_consistency()
-        self.ac3()
+        if not self.ac3():
+            return None
+        # the search never undoes what was removed before it started
+        self.trail.clear()
         return self.backtrack(dict())
 
     def enforce_node_consistency(self):
@@ -103,9 +174,7 @@ class CrosswordCreator():
         # if the word length is different then the variable length,
         # it can't be used at this specific variable, so remove it...
         for variable in self.crossword.variables:
-            for word in self.crossword.words:
-                if variable.length != len(word):
-                    self.domains[variable].remove(word)
+            self.domains[variable] &= self.lengths.get(variable.length, 0)
 
     def revise(self, x, y):
         """
@@ -117,7 +186,6 @@ class CrosswordCreator():
         False if no revision was made.
         """
 
-        removeList = []
         overlap = self.crossword.overlaps[x, y]
 
         # check if there's overlap between variable X and variable Y
@@ -126,26 +194,28 @@ class CrosswordCreator():
         else:
             index1, index2 = overlap
 
-        # index1 and index2 are the positions inside the variables of the overlapping square
-        for word1 in self.domains[x]:
-            overlap_possible = False
-            # compare the word from the first domain to all potential words in the second domain
-            for word2 in self.domains[y]:
-                # check if both words match on their overlapping square (and make sure they're different...)
-                if (word1 != word2) and (word1[index1] == word2[index2]):
-                    overlap_possible = True
-                    break
-            # if word1 doesn't have a matching word that overlaps on the square, add it to the list
-            # of words to be removed (those words cannot be used)
-            if not overlap_possible:
-                removeList.append(word1)
-
-        # remove the words from X domain
-        for word in removeList:
-            self.domains[x].remove(word)
-
-        # if we found at least one word to remove, return True
-        return len(removeList) > 0
+        # index1 and index2 are the positions inside the variables of the overlapping square,
+        # so a word of X is possible if some word of Y has the same letter on that square
+        possible = 0
+        for letter in self.letters:
+            matches = self.index.get((y.length, index2, letter), 0) & self.domains[y]
+            if not matches:
+                continue
+            candidates = self.index.get((x.length, index1, letter), 0)
+            # when a single word of Y has this letter, it can't match itself in X
+            # (both variables can't use the same word)
+            if matches & (matches - 1) == 0:
+                candidates &= ~matches
+            possible |= candidates
+
+        # remove the words from X domain that have no matching word in Y
+        self.revisions += 1
+        revised = self.domains[x] & possible
+        if revised == self.domains[x]:
+            return False
+        self.removed += bin(self.domains[x] ^ revised).count("1")
+        self.restrict(x, revised)
+        return True
 
     def ac3(self, arcs=None):
         """
@@ -161,18 +231,31 @@ class CrosswordCreator():
             # create the list of arcs - for each arc, get its neighbors and add the pair
             arcs = []
             for variable in self.crossword.variables:
-                for neighbor in self.crossword.neighbors(variable):
+                for neighbor in self.neighbors[variable]:
                     arcs.append((variable, neighbor))
 
-        # process the arcs in the list
-        for x, y in arcs:
+        # queue of arcs to process, and the set of arcs in it (so no arc is queued twice)
+        queue = deque()
+        queued = set()
+        for arc in arcs:
+            if arc not in queued:
+                queue.append(arc)
+                queued.add(arc)
+
+        while queue:
+            x, y = queue.popleft()
+            queued.remove((x, y))
             if self.revise(x, y):
-                # if we removed words from domain X, add all arcs from X to its neighbors so they would be re-processed
-                for neighbor in self.crossword.neighbors(x):
-                    arcs.append((x, neighbor))
+                # no word left for X, so the puzzle can't be solved
+                if not self.domains[x]:
+                    return False
+                # words of X's other neighbors may have lost their match in X, so check them again
+                for neighbor in self.neighbors[x]:
+                    if neighbor != y and (neighbor, x) not in queued:
+                        queue.append((neighbor, x))
+                        queued.add((neighbor, x))
 
-        # is the domain list empty?
-        return len(self.domains[x]) > 0
+        return True
 
     def assignment_complete(self, assignment):
         """
@@ -187,40 +270,45 @@ class CrosswordCreator():
 
         return True
 
-    def consistent(self, assignment):
+    def consistent(self, assignment, var=None, used=None):
         """
         Return True if `assignment` is consistent (i.e., words fit in crossword
         puzzle without conflicting characters); return False otherwise.
+
+        If `var` is given, the rest of the assignment is already known to be
+        consistent, so only `var` is checked. `used` is the set of words of
+        the other assigned variables, if already known.
         """
 
-        # go through the list of variables in the current assignment
-        for var1 in assignment:
-            word1 = assignment[var1]
-            # check word length to make sure it matches the constraint length
-            if len(word1) != var1.length:
+        if var is None:
+            # check if different assignment variables use the same word
+            if len(set(assignment.values())) != len(assignment):
                 return False
+            variables = assignment
+        else:
+            # only the new word can be used twice
+            if used is None:
+                used = set(assignment[other] for other in assignment if other != var)
+            if assignment[var] in used:
+                return False
+            variables = [var]
 
-            # check if the other words setup matches word1 setup
-            for var2 in assignment:
-                word2 = assignment[var2]
-                # dont compare var to itself...
-                if var1 == var2:
-                    continue
-
-                # check if different assignment variables use the same word
-                if word1 == word2:
-                    return False
+        # check word length to make sure it matches the constraint length
+        for var1 in variables:
+            if len(assignment[var1]) != var1.length:
+                return False
 
-                # now check the overlaps
-                overlap = self.crossword.overlaps[var1, var2]
-                # if no overlap for this pair of variables, move to the next variable in the assignment
-                if overlap is None:
+        for var1 in variables:
+            word1 = assignment[var1]
+            # check if the words of the assigned neighbors match word1 setup
+            for var2 in self.neighbors[var1]:
+                if var2 not in assignment:
                     continue
 
                 # get the overlap indexes
-                index1, index2 = overlap
+                index1, index2 = self.crossword.overlaps[var1, var2]
                 # check if letter in index1 of word1 doesnt match letter in index2 of word2
-                if word1[index1] != word2[index2]:
+                if word1[index1] != assignment[var2][index2]:
                     # words don't satisfy overlap constraints
                     return False
 
@@ -252,7 +340,7 @@ class CrosswordCreator():
                 neighborList.append(var2Check)
         """
 
-        return self.domains[var]
+        return self.domain_words(var)
 
     def select_unassigned_variable(self, assignment):
         """
@@ -270,12 +358,13 @@ class CrosswordCreator():
 
         return None
 
-    def backtrack(self, assignment):
+    def backtrack(self, assignment, used=None):
         """
         Using Backtracking Search, take as input a partial assignment for the
         crossword and return a complete assignment if possible to do so.
 
         `assignment` is a mapping from variables (keys) to words (values).
+        `used` is the set of words in `assignment` (built from it if not given).
 
         If no assignment is possible, return None.
         """
@@ -284,6 +373,9 @@ class CrosswordCreator():
         if self.assignment_complete(assignment):
             return assignment
 
+        if used is None:
+            used = set(assignment.values())
+
         # get a variable to fill a word into
         variable = self.select_unassigned_variable(assignment)
 
@@ -291,21 +383,52 @@ class CrosswordCreator():
         for value in self.order_domain_values(variable, assignment):
             # try using the word chosen
             assignment[variable] = value
+            self.nodes += 1
 
             # do all words fit in the crossword puzzle without conflicting characters
-            if self.consistent(assignment):
-                # check if the new partial assignment works
-                result = self.backtrack(assignment)
-
-                # if it doesnt work, remove the assignment to this variable,
-                # and move to the next potential word (if exists..)
-                if result is None:
-                    assignment[variable] = None
-                else:
-                    return result
+            if self.consistent(assignment, variable, used):
+                used.add(value)
+                # remove the words that can't go with this one from the other domains,
+                # and check if the new partial assignment works
+                mark = len(self.trail)
+                if self.inference(variable, value):
+                    result = self.backtrack(assignment, used)
+                    if result is not None:
+                        return result
+
+                # if it doesnt work, put the domains back the way they were
+                self.undo(mark)
+                used.remove(value)
+
+            # remove the assignment to this variable, and move to the next potential word (if exists..)
+            del assignment[variable]
 
         return None
 
+    def inference(self, var, word):
+        """
+        Maintain arc consistency after assigning `word` to `var`: shrink the
+        domain of `var` to just `word`, remove `word` from every other domain,
+        and run AC-3 on the arcs into the variables that changed. Changes are
+        saved on the trail.
+
+        Return False if some domain ends up empty; return True otherwise.
+        """
+        bit = 1 << self.numbers[word]
+        if self.domains[var] != bit:
+            self.restrict(var, bit)
+        arcs = [(neighbor, var) for neighbor in self.neighbors[var]]
+
+        # no other variable can use the same word
+        for other in self.crossword.variables:
+            if other != var and self.domains[other] & bit:
+                self.restrict(other, self.domains[other] & ~bit)
+                if not self.domains[other]:
+                    return False
+                arcs.extend((neighbor, other) for neighbor in self.neighbors[other])
+
+        return self.ac3(arcs)
+
 
 def main():
 
@@ -0,0 +1,73 @@
+"""
+Compute gene and trait probabilities for many families at once.
+"""
+
+import csv
+import multiprocessing
+import os
+import sys
+
+import heredity
+
+# Number of families sent to a worker at a time
+CHUNK_SIZE = 16
+
+
+def main():
+
+    # Check for proper usage
+    method = sys.argv[3] if len(sys.argv) == 4 else "elimination"
+    if len(sys.argv) not in [3, 4] or method not in heredity.METHODS or method in heredity.SAMPLERS:
+        exact = [m for m in heredity.METHODS if m not in heredity.SAMPLERS]
+        sys.exit(f"Usage: python batch.py (directory|manifest) output.csv [{'|'.join(exact)}]")
+    files = family_files(sys.argv[1])
+
+    with open(sys.argv[2], "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "name", "gene_2", "gene_1", "gene_0", "trait_true", "trait_false"])
+
+        # Every worker builds the probability tables once (when importing
+        # heredity), and reuses them for all its families
+        with multiprocessing.Pool() as pool:
+            tasks = [(filename, method) for filename in files]
+            for filename, probabilities, error in pool.imap(solve, tasks, chunksize=CHUNK_SIZE):
+                if error is not None:
+                    print(f"{filename}: {error}", file=sys.stderr)
+                    continue
+                for person, p in probabilities.items():
+                    writer.writerow([filename, person] +
+                                    [f"{p['gene'][geneCount]:.4f}" for geneCount in [2, 1, 0]] +
+                                    [f"{p['trait'][hasTrait]:.4f}" for hasTrait in [True, False]])
+
+
+def family_files(source):
+    """
+    Return the family CSV files to process: every .csv file in `source` if
+    it is a directory, otherwise the files listed in `source`, one per line
+    (relative to the directory of the list).
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.endswith(".csv")
+        )
+    base = os.path.dirname(source)
+    with open(source) as f:
+        return [os.path.join(base, line.strip()) for line in f if line.strip()]
+
+
+def solve(task):
+    """
+    Compute the probabilities of one family file, returning the error
+    instead of raising it so one bad file doesn't stop the batch.
+    """
+    filename, method = task
+    try:
+        people = heredity.load_data(filename)
+        return filename, heredity.METHODS[method](people), None
+    except (OSError, KeyError, ValueError, ZeroDivisionError) as e:
+        return filename, None, repr(e)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import csv
 import itertools
+import math
+import random
 import sys
 
 PROBS = {
@@ -36,16 +38,44 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Default number of samples drawn by the sampling methods
+SAMPLES = 10000
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    method = sys.argv[2] if len(sys.argv) > 2 else "enumerate"
+    if (len(sys.argv) not in [2, 3, 4, 5] or method not in METHODS or
+            (len(sys.argv) > 3 and method not in SAMPLERS)):
+        sys.exit(f"Usage: python heredity.py data.csv [{'|'.join(METHODS)}] [samples] [seed]")
     people = load_data(sys.argv[1])
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    # Compute gene and trait probabilities for each person
+    if method in SAMPLERS:
+        samples = int(sys.argv[3]) if len(sys.argv) > 3 else SAMPLES
+        seed = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        if samples <= 0:
+            sys.exit("Number of samples must be positive")
+        probabilities = METHODS[method](people, samples, seed, report=sys.stderr)
+    else:
+        probabilities = METHODS[method](people)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def empty_probabilities(people):
+    """
+    Returns a probabilities dictionary with every probability set to 0.
+    """
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -60,38 +90,64 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+def enumerate_probabilities(people):
+    """
+    Returns the gene and trait probabilities of each person, computed by
+    summing the joint probability of every possible assignment.
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+    Only gene assignments are enumerated: summing the joint probability over
+    the traits nobody knows gives 1 for each of them, and known traits
+    can't take any other value, so the trait of each person is accounted
+    for directly instead of looping over sets of people with the trait.
+    """
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Keep track of gene and trait probabilities for each person
+    probabilities = empty_probabilities(people)
+
+    # Probability of each person's gene count (given their parents' gene
+    # counts) times the probability of their known trait, computed once
+    names = list(people)
+    position = {person: i for i, person in enumerate(names)}
+    tables = []
+    for person in names:
+        trait = people[person]["trait"]
+        evidence = [1 if trait is None else PROBS["trait"][geneCount][trait]
+                    for geneCount in range(3)]
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if mother is None:
+            tables.append((None, None, {
+                (geneCount, 0, 0): PROBS["gene"][geneCount] * evidence[geneCount]
+                for geneCount in range(3)
+            }))
+        else:
+            tables.append((position[mother], position[father], {
+                key: p * evidence[key[0]] for key, p in INHERITANCE.items()
+            }))
+
+    # Loop over all gene counts people might have
+    for counts in gene_counts(len(names)):
+        p = 1
+        for i, (mother, father, table) in enumerate(tables):
+            p *= table[(counts[i],
+                        0 if mother is None else counts[mother],
+                        0 if father is None else counts[father])]
+
+        # Update probabilities with new joint probability
+        for i, person in enumerate(names):
+            geneCount = counts[i]
+            probabilities[person]["gene"][geneCount] += p
+            trait = people[person]["trait"]
+            if trait is None:
+                for hasTrait in [True, False]:
+                    probabilities[person]["trait"][hasTrait] += p * PROBS["trait"][geneCount][hasTrait]
+            else:
+                probabilities[person]["trait"][trait] += p
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    return probabilities
 
 
 def load_data(filename):
@@ -118,14 +174,33 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Generate all possible subsets of set s, one at a time.
+    Subset number `mask` holds the elements whose bit is set in `mask`.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    for mask in range(2 ** len(s)):
+        yield {s[i] for i in range(len(s)) if mask >> i & 1}
+
+
+def gene_counts(n):
+    """
+    Generate every tuple of gene counts of n people, one at a time,
+    by counting in base 3: digit i of the counter is the gene count
+    of person i.
+    """
+    counter = [0] * n
+    while True:
+        yield tuple(counter)
+
+        # add 1 to the counter, carrying over digits that reach 3
+        i = 0
+        while i < n and counter[i] == 2:
+            counter[i] = 0
+            i += 1
+        if i == n:
+            return
+        counter[i] += 1
+
 
 def calcGeneProb(geneCount, motherGeneCount, fatherGeneCount):
 
@@ -196,7 +271,7 @@ def joint_probability(people, one_gene, two_genes, have_trait):
                 fatherGeneCount = 2
 
             # calc the probability, based on person genes + parents genes (and mutations)
-            probGene = calcGeneProb(geneCount, motherGeneCount, fatherGeneCount)
+            probGene = INHERITANCE[(geneCount, motherGeneCount, fatherGeneCount)]
 
         # get the trait probability (it has nothing to do with parents trait)
         probTrait = PROBS["trait"][geneCount][hasTrait]
@@ -248,5 +323,635 @@ def normalize(probabilities):
         probabilities[person]["trait"][True] /= traitSum
         probabilities[person]["trait"][False] /= traitSum
 
+def inheritance_table():
+    """
+    Return the probability of every gene count of a child given the gene
+    counts of its parents, as a dictionary keyed by (child, mother, father).
+    Raise ValueError if the probabilities for some pair of parents don't
+    sum to 1.
+    """
+    table = {
+        (geneCount, motherGeneCount, fatherGeneCount):
+            calcGeneProb(geneCount, motherGeneCount, fatherGeneCount)
+        for geneCount in range(3)
+        for motherGeneCount in range(3)
+        for fatherGeneCount in range(3)
+    }
+    for motherGeneCount in range(3):
+        for fatherGeneCount in range(3):
+            total = sum(table[(geneCount, motherGeneCount, fatherGeneCount)]
+                        for geneCount in range(3))
+            if abs(total - 1) > 1e-9:
+                raise ValueError(
+                    f"child gene probabilities for parents with {motherGeneCount} "
+                    f"and {fatherGeneCount} genes sum to {total}, not 1"
+                )
+    return table
+
+
+# Probability of a child's gene count given their parents' gene counts, keyed
+# by (child, mother, father), built once from PROBS and used by every method
+# (it is shared, so it must not be modified)
+INHERITANCE = inheritance_table()
+
+
+def trait_factor(person, trait):
+    """
+    Return the factor giving the probability of a person's known trait
+    given their gene count.
+    """
+    return ((person,), {
+        (geneCount,): PROBS["trait"][geneCount][trait] for geneCount in range(3)
+    })
+
+
+def gene_factors(people, evidence=True):
+    """
+    Return the factors of the family: for each person, the probability of
+    their gene count (given their parents' gene counts, if known), and, for
+    people with a known trait (if `evidence` is True), the probability of
+    that trait given their gene count. A factor is a pair (variables, table)
+    where the table maps each tuple of gene counts of the variables to a
+    probability.
+    """
+    factors = []
+    for person in people:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if mother is None:
+            factors.append(((person,), {
+                (geneCount,): PROBS["gene"][geneCount] for geneCount in range(3)
+            }))
+        else:
+            factors.append(((person, mother, father), INHERITANCE))
+
+        # the trait only matters if it's known, otherwise it sums to 1
+        trait = people[person]["trait"]
+        if evidence and trait is not None:
+            factors.append(trait_factor(person, trait))
+    return factors
+
+
+def multiply(first, second):
+    """
+    Return the product of two factors.
+    """
+    variables = first[0] + tuple(v for v in second[0] if v not in first[0])
+    table = dict()
+    for assignment in itertools.product(range(3), repeat=len(variables)):
+        values = dict(zip(variables, assignment))
+        table[assignment] = (first[1][tuple(values[v] for v in first[0])] *
+                             second[1][tuple(values[v] for v in second[0])])
+    return variables, table
+
+
+def sum_out(factor, variable):
+    """
+    Return the factor with `variable` summed out.
+    """
+    variables, table = factor
+    i = variables.index(variable)
+    summed = dict()
+    for assignment, p in table.items():
+        rest = assignment[:i] + assignment[i + 1:]
+        summed[rest] = summed.get(rest, 0) + p
+    return variables[:i] + variables[i + 1:], summed
+
+
+def eliminate(factors, keep):
+    """
+    Sum out every variable but `keep` from the product of the factors,
+    always eliminating the variable giving the smallest new factor first.
+    Return the remaining factor over `keep`.
+    """
+    factors = list(factors)
+    variables = set(v for factor in factors for v in factor[0]) - {keep}
+    while variables:
+        # pick the variable whose factors share the fewest other variables
+        def width(variable):
+            return len(set(v for factor in factors if variable in factor[0] for v in factor[0]))
+        variable = min(variables, key=width)
+        variables.remove(variable)
+
+        involved = [factor for factor in factors if variable in factor[0]]
+        factors = [factor for factor in factors if variable not in factor[0]]
+        product = involved[0]
+        for factor in involved[1:]:
+            product = multiply(product, factor)
+        factors.append(sum_out(product, variable))
+
+    result = ((keep,), {(geneCount,): 1 for geneCount in range(3)})
+    for factor in factors:
+        if factor[0]:
+            result = multiply(result, factor)
+    return result
+
+
+def elimination_probabilities(people):
+    """
+    Returns the gene and trait probabilities of each person, computed exactly
+    with variable elimination over the gene counts of the family.
+    """
+    probabilities = empty_probabilities(people)
+    factors = gene_factors(people)
+    for person in people:
+        variables, table = eliminate(factors, person)
+        for geneCount in range(3):
+            probabilities[person]["gene"][geneCount] = table[(geneCount,)]
+
+        # a known trait is certain, an unknown one follows the gene count
+        trait = people[person]["trait"]
+        for hasTrait in [True, False]:
+            if trait is None:
+                probabilities[person]["trait"][hasTrait] = sum(
+                    table[(geneCount,)] * PROBS["trait"][geneCount][hasTrait]
+                    for geneCount in range(3)
+                )
+            else:
+                probabilities[person]["trait"][hasTrait] = 1 if trait == hasTrait else 0
+
+    normalize(probabilities)
+    return probabilities
+
+
+class JunctionTree():
+    """
+    Junction tree of a family, compiled once from its factors, answering
+    gene and trait probabilities for any set of known traits.
+    Messages between cliques are cached: when the trait of one person
+    changes, only the messages flowing away from that person's clique
+    have to be computed again.
+    """
+
+    def __init__(self, people):
+        """
+        Compile the junction tree of the family in `people`, starting
+        with the traits known in the data.
+        """
+        self.people = people
+        self.traits = {person: people[person]["trait"] for person in people}
+        factors = gene_factors(people, evidence=False)
+
+        # Moral graph: connect the variables of each factor (a person and
+        # their parents)
+        neighbors = {person: set() for person in people}
+        for variables, _ in factors:
+            for v in variables:
+                neighbors[v].update(w for w in variables if w != v)
+
+        # Triangulate by eliminating the variable adding the fewest edges
+        # first; each elimination gives a clique
+        self.cliques = []
+        remaining = set(people)
+        while remaining:
+            def fill(v):
+                near = list(neighbors[v] & remaining)
+                return sum(1 for a, b in itertools.combinations(near, 2)
+                           if b not in neighbors[a])
+            v = min(remaining, key=fill)
+            near = neighbors[v] & remaining
+            for a, b in itertools.combinations(near, 2):
+                neighbors[a].add(b)
+                neighbors[b].add(a)
+            clique = frozenset(near | {v})
+            if not any(clique <= other for other in self.cliques):
+                self.cliques.append(clique)
+            remaining.remove(v)
+
+        # Connect cliques with a maximum spanning tree on shared variables
+        # (Kruskal), which keeps every person's cliques connected
+        group = list(range(len(self.cliques)))
+
+        def find(i):
+            while group[i] != i:
+                group[i] = group[group[i]]
+                i = group[i]
+            return i
+
+        self.edges = {i: [] for i in range(len(self.cliques))}
+        pairs = sorted(
+            itertools.combinations(range(len(self.cliques)), 2),
+            key=lambda pair: -len(self.cliques[pair[0]] & self.cliques[pair[1]])
+        )
+        for i, j in pairs:
+            if find(i) != find(j):
+                group[find(i)] = find(j)
+                self.edges[i].append(j)
+                self.edges[j].append(i)
+
+        # Each factor goes to the smallest clique holding its variables,
+        # and each person to the smallest clique holding them
+        potentials = [
+            (tuple(clique), {assignment: 1 for assignment in itertools.product(range(3), repeat=len(clique))})
+            for clique in self.cliques
+        ]
+        for factor in factors:
+            i = min((i for i, clique in enumerate(self.cliques) if set(factor[0]) <= clique),
+                    key=lambda i: len(self.cliques[i]))
+            potentials[i] = multiply(potentials[i], factor)
+        self.potentials = potentials
+        self.home = {
+            person: min((i for i, clique in enumerate(self.cliques) if person in clique),
+                        key=lambda i: len(self.cliques[i]))
+            for person in people
+        }
+
+        self.messages = dict()
+
+    def set_trait(self, person, trait):
+        """
+        Set the known trait of a person (None if unknown), invalidating
+        only the messages that depend on it.
+        """
+        if self.traits[person] == trait:
+            return
+        self.traits[person] = trait
+
+        # Messages sent away from the person's clique carry their trait
+        start = self.home[person]
+        frontier = [start]
+        visited = {start}
+        while frontier:
+            i = frontier.pop()
+            for j in self.edges[i]:
+                if j not in visited:
+                    visited.add(j)
+                    self.messages.pop((i, j), None)
+                    frontier.append(j)
+
+    def local_factor(self, i, exclude=None):
+        """
+        Return the product of the potential of clique i, the known traits of
+        people living in it and the messages of its neighbours (but
+        `exclude`).
+        """
+        factor = self.potentials[i]
+        for person, home in self.home.items():
+            if home == i and self.traits[person] is not None:
+                factor = multiply(factor, trait_factor(person, self.traits[person]))
+        for j in self.edges[i]:
+            if j != exclude:
+                factor = multiply(factor, self.messages[(j, i)])
+        return factor
+
+    def send(self, i, j):
+        """
+        Compute the message from clique i to clique j, unless it is cached.
+        """
+        if (i, j) in self.messages:
+            return
+        factor = self.local_factor(i, exclude=j)
+        for v in self.cliques[i] - self.cliques[j]:
+            factor = sum_out(factor, v)
+        self.messages[(i, j)] = factor
+
+    def calibrate(self):
+        """
+        Make sure every message is computed: first towards clique 0, then
+        back out from it.
+        """
+        # a family without people has no cliques and nothing to compute
+        if not self.cliques:
+            return
+        order = [0]
+        parent = {0: None}
+        for i in order:
+            for j in self.edges[i]:
+                if j not in parent:
+                    parent[j] = i
+                    order.append(j)
+        for i in reversed(order[1:]):
+            self.send(i, parent[i])
+        for i in order:
+            for j in self.edges[i]:
+                if j != parent[i]:
+                    self.send(i, j)
+
+    def probabilities(self):
+        """
+        Returns the gene and trait probabilities of each person, given the
+        traits currently known.
+        """
+        self.calibrate()
+        probabilities = empty_probabilities(self.people)
+        beliefs = dict()
+        for person in self.people:
+            i = self.home[person]
+            if i not in beliefs:
+                beliefs[i] = self.local_factor(i)
+            factor = beliefs[i]
+            for v in self.cliques[i] - {person}:
+                factor = sum_out(factor, v)
+            for geneCount in range(3):
+                probabilities[person]["gene"][geneCount] = factor[1][(geneCount,)]
+
+            # a known trait is certain, an unknown one follows the gene count
+            trait = self.traits[person]
+            for hasTrait in [True, False]:
+                if trait is None:
+                    probabilities[person]["trait"][hasTrait] = sum(
+                        factor[1][(geneCount,)] * PROBS["trait"][geneCount][hasTrait]
+                        for geneCount in range(3)
+                    )
+                else:
+                    probabilities[person]["trait"][hasTrait] = 1 if trait == hasTrait else 0
+
+        normalize(probabilities)
+        return probabilities
+
+
+def junction_tree_probabilities(people):
+    """
+    Returns the gene and trait probabilities of each person, computed
+    exactly by calibrating a junction tree of the family.
+    """
+    return JunctionTree(people).probabilities()
+
+
+def vectorized_probabilities(people):
+    """
+    Returns the gene and trait probabilities of each person, like
+    enumerate_probabilities, but computed with NumPy over an array holding
+    every assignment of gene counts at once. Unknown traits sum to 1 in
+    the joint probability, so only known traits are part of the arrays.
+    Meant for small families: the arrays hold 3 ** len(people) assignments.
+    """
+    import numpy as np
+
+    # a family without people has nothing to compute (and no arrays to build)
+    if not people:
+        return empty_probabilities(people)
+
+    names = list(people)
+    position = {person: i for i, person in enumerate(names)}
+
+    # genes[i] holds the gene count of person i in every assignment
+    shape = (3,) * len(names)
+    genes = np.indices(shape).reshape(len(names), -1)
+
+    # probability tables, indexed by gene counts (and trait)
+    prior = np.array([PROBS["gene"][geneCount] for geneCount in range(3)])
+    inheritance = np.zeros((3, 3, 3))
+    for (geneCount, motherGeneCount, fatherGeneCount), p in INHERITANCE.items():
+        inheritance[geneCount, motherGeneCount, fatherGeneCount] = p
+    traitProb = np.array([
+        [PROBS["trait"][geneCount][False], PROBS["trait"][geneCount][True]]
+        for geneCount in range(3)
+    ])
+
+    # joint probability of every assignment, one person at a time
+    joint = np.ones(genes.shape[1])
+    for person in names:
+        i = position[person]
+        if people[person]["mother"] is None:
+            joint *= prior[genes[i]]
+        else:
+            mother = position[people[person]["mother"]]
+            father = position[people[person]["father"]]
+            joint *= inheritance[genes[i], genes[mother], genes[father]]
+        if people[person]["trait"] is not None:
+            joint *= traitProb[genes[i], int(people[person]["trait"])]
+    joint = joint.reshape(shape)
+
+    probabilities = empty_probabilities(people)
+    for person in names:
+        i = position[person]
+        others = tuple(axis for axis in range(len(names)) if axis != i)
+        geneProb = joint.sum(axis=others)
+        for geneCount in range(3):
+            probabilities[person]["gene"][geneCount] = float(geneProb[geneCount])
+
+        # a known trait is certain, an unknown one follows the gene count
+        trait = people[person]["trait"]
+        for hasTrait in [True, False]:
+            if trait is None:
+                probabilities[person]["trait"][hasTrait] = float(
+                    geneProb @ traitProb[:, int(hasTrait)]
+                )
+            else:
+                probabilities[person]["trait"][hasTrait] = 1 if trait == hasTrait else 0
+
+    normalize(probabilities)
+    return probabilities
+
+
+def topological_order(people):
+    """
+    Return the names of people ordered so that parents come before
+    their children.
+    """
+    order = []
+    visited = set()
+
+    def visit(person):
+        if person is None or person in visited:
+            return
+        visited.add(person)
+        visit(people[person]["mother"])
+        visit(people[person]["father"])
+        order.append(person)
+
+    for person in people:
+        visit(person)
+    return order
+
+
+def sample_gene(rng, weights):
+    """
+    Return a gene count drawn with probability proportional to `weights`.
+    """
+    r = rng.random() * sum(weights)
+    for geneCount in range(2):
+        r -= weights[geneCount]
+        if r < 0:
+            return geneCount
+    return 2
+
+
+def sampled_probabilities(people, geneTotals):
+    """
+    Return the probabilities dictionary matching the (unnormalized) gene
+    count totals of each person; unknown traits follow the gene counts.
+    """
+    probabilities = empty_probabilities(people)
+    for person in people:
+        for geneCount in range(3):
+            probabilities[person]["gene"][geneCount] = geneTotals[person][geneCount]
+        trait = people[person]["trait"]
+        for hasTrait in [True, False]:
+            if trait is None:
+                probabilities[person]["trait"][hasTrait] = sum(
+                    geneTotals[person][geneCount] * PROBS["trait"][geneCount][hasTrait]
+                    for geneCount in range(3)
+                )
+            else:
+                probabilities[person]["trait"][hasTrait] = 1 if trait == hasTrait else 0
+    normalize(probabilities)
+    return probabilities
+
+
+def report_progress(report, method, done, samples, previous, current, extra=""):
+    """
+    Write how much the gene probabilities moved since the last checkpoint,
+    which goes to 0 as the sampler converges. Return the current estimate.
+    """
+    if report is not None and previous is not None:
+        change = max(
+            (abs(current[person]["gene"][geneCount] - previous[person]["gene"][geneCount])
+             for person in current for geneCount in range(3)),
+            default=0
+        )
+        print(f"{method}: {done}/{samples} samples, max change {change:.5f}{extra}", file=report)
+    return current
+
+
+def likelihood_weighting(people, samples=SAMPLES, seed=None, report=None):
+    """
+    Returns approximate gene and trait probabilities of each person, by
+    sampling gene counts from the parents down and weighting each sample
+    by the probability of the known traits. Progress (change of the
+    estimates and effective sample size) is written to `report`, if given.
+    """
+    if samples <= 0:
+        raise ValueError("number of samples must be positive")
+    rng = random.Random(seed)
+    order = topological_order(people)
+    geneTotals = {person: [0, 0, 0] for person in people}
+    weightSum = 0
+    weightSquares = 0
+    estimate = None
+    checkpoint = max(samples // 10, 1)
+
+    # Weights of large families underflow, so they are kept as logarithms
+    # and every total is scaled down by exp(scale), the largest weight yet
+    scale = -math.inf
+
+    for done in range(1, samples + 1):
+        counts = dict()
+        logWeight = 0
+        for person in order:
+            mother = people[person]["mother"]
+            if mother is None:
+                weights = [PROBS["gene"][geneCount] for geneCount in range(3)]
+            else:
+                father = people[person]["father"]
+                weights = [INHERITANCE[(geneCount, counts[mother], counts[father])]
+                           for geneCount in range(3)]
+            counts[person] = sample_gene(rng, weights)
+
+            trait = people[person]["trait"]
+            if trait is not None:
+                logWeight += math.log(PROBS["trait"][counts[person]][trait])
+
+        if logWeight > scale:
+            rescale = math.exp(scale - logWeight)
+            for person in people:
+                for geneCount in range(3):
+                    geneTotals[person][geneCount] *= rescale
+            weightSum *= rescale
+            weightSquares *= rescale ** 2
+            scale = logWeight
+        weight = math.exp(logWeight - scale)
+
+        for person in people:
+            geneTotals[person][counts[person]] += weight
+        weightSum += weight
+        weightSquares += weight ** 2
+
+        if done % checkpoint == 0 or done == samples:
+            effective = weightSum ** 2 / weightSquares
+            estimate = report_progress(
+                report, "likelihood", done, samples, estimate,
+                sampled_probabilities(people, geneTotals),
+                f", effective samples {effective:.0f}"
+            )
+
+    return sampled_probabilities(people, geneTotals)
+
+
+def gibbs_sampling(people, samples=SAMPLES, seed=None, report=None):
+    """
+    Returns approximate gene and trait probabilities of each person, by
+    Gibbs sampling: each sweep redraws every person's gene count given
+    everyone else's. The first tenth of the sweeps are discarded as
+    burn-in. Progress (change of the estimates) is written to `report`,
+    if given.
+    """
+    if samples <= 0:
+        raise ValueError("number of samples must be positive")
+    rng = random.Random(seed)
+    order = topological_order(people)
+    children = {person: [] for person in people}
+    for person in people:
+        if people[person]["mother"] is not None:
+            children[people[person]["mother"]].append(person)
+            children[people[person]["father"]].append(person)
+
+    # Start from gene counts drawn from the parents down
+    counts = dict()
+    for person in order:
+        mother = people[person]["mother"]
+        if mother is None:
+            weights = [PROBS["gene"][geneCount] for geneCount in range(3)]
+        else:
+            weights = [INHERITANCE[(geneCount, counts[mother], counts[people[person]["father"]])]
+                       for geneCount in range(3)]
+        counts[person] = sample_gene(rng, weights)
+
+    geneTotals = {person: [0, 0, 0] for person in people}
+    burnIn = samples // 10
+    estimate = None
+    checkpoint = max(samples // 10, 1)
+
+    for sweep in range(1, burnIn + samples + 1):
+        for person in order:
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+            trait = people[person]["trait"]
+            weights = []
+            for geneCount in range(3):
+                if mother is None:
+                    w = PROBS["gene"][geneCount]
+                else:
+                    w = INHERITANCE[(geneCount, counts[mother], counts[father])]
+                if trait is not None:
+                    w *= PROBS["trait"][geneCount][trait]
+                for child in children[person]:
+                    if people[child]["mother"] == person:
+                        w *= INHERITANCE[(counts[child], geneCount, counts[people[child]["father"]])]
+                    else:
+                        w *= INHERITANCE[(counts[child], counts[people[child]["mother"]], geneCount)]
+                weights.append(w)
+            counts[person] = sample_gene(rng, weights)
+
+            # Count the whole conditional distribution, not just the draw
+            if sweep > burnIn:
+                total = sum(weights)
+                for geneCount in range(3):
+                    geneTotals[person][geneCount] += weights[geneCount] / total
+
+        done = sweep - burnIn
+        if done > 0 and (done % checkpoint == 0 or done == samples):
+            estimate = report_progress(
+                report, "gibbs", done, samples, estimate,
+                sampled_probabilities(people, geneTotals)
+            )
+
+    return sampled_probabilities(people, geneTotals)
+
+
+METHODS = {
+    "enumerate": enumerate_probabilities,
+    "elimination": elimination_probabilities,
+    "vectorized": vectorized_probabilities,
+    "junction": junction_tree_probabilities,
+    "likelihood": likelihood_weighting,
+    "gibbs": gibbs_sampling
+}
+
+# Methods that take a sample budget and a seed
+SAMPLERS = ["likelihood", "gibbs"]
+
+
 if __name__ == "__main__":
     main()
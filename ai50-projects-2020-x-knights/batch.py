@@ -0,0 +1,144 @@
+"""
+Solve many knights and knaves puzzles at once.
+
+Each line of the input file is a JSON puzzle such as
+
+    {"id": "puzzle1",
+     "characters": ["A", "B"],
+     "statements": [{"speaker": "A", "says": ["and", ["knave", "A"], ["knave", "B"]]}]}
+
+where a statement is one of ["knight", name], ["knave", name], ["not", s],
+["and", s, ...], ["or", s, ...], ["implies", s1, s2] or ["iff", s1, s2].
+Each line of the output is the solution of the puzzle on the same line.
+"""
+
+import json
+import multiprocessing
+import sys
+
+from logic import *
+
+# Number of puzzles sent to a worker at a time
+CHUNK_SIZE = 64
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python batch.py puzzles.jsonl [output.jsonl]")
+
+    with open(sys.argv[1]) as f:
+        lines = [line for line in f if line.strip()]
+
+    output = open(sys.argv[2], "w") if len(sys.argv) == 3 else sys.stdout
+    with multiprocessing.Pool() as pool:
+        for solution in pool.imap(solve_line, lines, chunksize=CHUNK_SIZE):
+            output.write(json.dumps(solution) + "\n")
+    if output is not sys.stdout:
+        output.close()
+
+
+def knight(name):
+    """Returns the symbol for `name` being a knight."""
+    return Symbol(f"{name} is a Knight")
+
+
+def knave(name):
+    """Returns the symbol for `name` being a knave."""
+    return Symbol(f"{name} is a Knave")
+
+
+def parse_statement(statement, characters):
+    """
+    Returns the logical sentence of a statement given in JSON form.
+    """
+    if not isinstance(statement, list) or not statement:
+        raise ValueError(f"invalid statement {statement!r}")
+    operator, operands = statement[0], statement[1:]
+
+    if operator in ["knight", "knave"]:
+        if len(operands) != 1 or operands[0] not in characters:
+            raise ValueError(f"invalid statement {statement!r}")
+        return knight(operands[0]) if operator == "knight" else knave(operands[0])
+
+    sentences = [parse_statement(operand, characters) for operand in operands]
+    if operator == "not" and len(sentences) == 1:
+        return Not(sentences[0])
+    if operator == "and" and sentences:
+        return And(*sentences)
+    if operator == "or" and sentences:
+        return Or(*sentences)
+    if operator == "implies" and len(sentences) == 2:
+        return Implication(*sentences)
+    if operator == "iff" and len(sentences) == 2:
+        return Biconditional(*sentences)
+    raise ValueError(f"invalid statement {statement!r}")
+
+
+def build_knowledge(puzzle):
+    """
+    Returns the knowledge base of a puzzle: every character is either a
+    knight or a knave, knights say true things and knaves say false things.
+    """
+    characters = puzzle["characters"]
+    if not isinstance(characters, list) or not all(
+        isinstance(name, str) for name in characters
+    ):
+        raise ValueError(f"characters must be a list of names, not {characters!r}")
+    knowledge = KnowledgeBase()
+    for name in characters:
+        knowledge.add(Or(knight(name), knave(name)))
+        knowledge.add(Not(And(knight(name), knave(name))))
+
+    for statement in puzzle.get("statements", []):
+        speaker = statement["speaker"]
+        if speaker not in characters:
+            raise ValueError(f"unknown speaker {speaker!r}")
+        said = parse_statement(statement["says"], characters)
+        knowledge.add(Implication(knight(speaker), said))
+        knowledge.add(Implication(knave(speaker), Not(said)))
+    return knowledge
+
+
+def solve(puzzle):
+    """
+    Returns the solution of a puzzle: who is known to be a knight, who is
+    known to be a knave, and who can't be determined.
+    """
+    knowledge = build_knowledge(puzzle)
+    solution = {
+        "id": puzzle.get("id"),
+        # Knowledge that entails false has no model at all
+        "consistent": not knowledge.entails(Or()),
+        "knights": [],
+        "knaves": [],
+        "unknown": []
+    }
+    if not solution["consistent"]:
+        return solution
+
+    for name in puzzle["characters"]:
+        if knowledge.entails(knight(name)):
+            solution["knights"].append(name)
+        elif knowledge.entails(knave(name)):
+            solution["knaves"].append(name)
+        else:
+            solution["unknown"].append(name)
+    return solution
+
+
+def solve_line(line):
+    """
+    Solves the puzzle on one line of input, reporting errors in the output
+    instead of stopping the whole batch.
+    """
+    try:
+        puzzle = json.loads(line)
+        return solve(puzzle)
+    except (ValueError, KeyError, TypeError) as e:
+        return {"error": str(e), "line": line.strip()}
+
+
+if __name__ == "__main__":
+    main()
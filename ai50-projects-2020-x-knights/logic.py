@@ -1,12 +1,31 @@
 import itertools
+import multiprocessing
+import weakref
 
 
 class Sentence():
 
+    # Sentences are hash-consed: building a sentence out of the same parts
+    # as an existing one returns the existing node. Nodes cache their hash
+    # and their set of symbols, since they never change once built.
+    __slots__ = ("__weakref__", "cached_hash", "cached_symbols")
+
+    # Every live sentence, keyed by class and parts (child sentences are
+    # keyed by identity, which keeps them alive while used)
+    interned = weakref.WeakValueDictionary()
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave symbols
+        out: returns True or False if every completion of the model agrees
+        on the value, None if the value is still unknown.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -15,6 +34,43 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def children(self):
+        """Returns the sentences this logical sentence is built from."""
+        return ()
+
+    def compile_expression(self, index, shared=None):
+        """
+        Returns a Python expression evaluating the sentence on `model`,
+        a sequence of booleans where symbol `name` is at `index[name]`.
+        Subsentences found in `shared` are replaced by the variable it
+        maps them to.
+        """
+        raise Exception("nothing to compile")
+
+    def compile_bitwise_expression(self, index, shared=None):
+        """
+        Returns a Python expression evaluating the sentence on many models at
+        once: bit m of `masks[index[name]]` is the value of symbol `name` in
+        model m, and `full` has a bit set for every model.
+        Subsentences found in `shared` are replaced by the variable it
+        maps them to.
+        """
+        raise Exception("nothing to compile")
+
+    @classmethod
+    def compile_operand(cls, sentence, index, shared):
+        """Compiles an operand, unless it is already held in a variable."""
+        if shared and sentence in shared:
+            return shared[sentence]
+        return sentence.compile_expression(index, shared)
+
+    @classmethod
+    def compile_bitwise_operand(cls, sentence, index, shared):
+        """Compiles an operand bitwise, unless it is already held in a variable."""
+        if shared and sentence in shared:
+            return shared[sentence]
+        return sentence.compile_bitwise_expression(index, shared)
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -43,15 +99,29 @@ class Sentence():
 
 
 class Symbol(Sentence):
-
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        key = (cls, name)
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = super().__new__(cls)
+            sentence.name = name
+            sentence.cached_hash = hash(("symbol", name))
+            sentence.cached_symbols = frozenset([name])
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self.cached_hash
 
     def __repr__(self):
         return self.name
@@ -62,23 +132,55 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return set(self.cached_symbols)
+
+    def compile_expression(self, index, shared=None):
+        try:
+            return f"model[{index[self.name]}]"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def compile_bitwise_expression(self, index, shared=None):
+        try:
+            return f"masks[{index[self.name]}]"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        key = (cls, id(operand))
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = super().__new__(cls)
+            sentence.operand = operand
+            sentence.cached_hash = hash(("not", hash(operand)))
+            sentence.cached_symbols = operand.cached_symbols
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and hash(self) == hash(other)
+            and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self.cached_hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +188,59 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
-        return self.operand.symbols()
+        return set(self.cached_symbols)
+
+    def children(self):
+        return (self.operand,)
+
+    def compile_expression(self, index, shared=None):
+        operand = Sentence.compile_operand(self.operand, index, shared)
+        return f"(not {operand})"
+
+    def compile_bitwise_expression(self, index, shared=None):
+        operand = Sentence.compile_bitwise_operand(self.operand, index, shared)
+        return f"(full ^ {operand})"
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        key = (cls,) + tuple(id(conjunct) for conjunct in conjuncts)
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = super().__new__(cls)
+            sentence.conjuncts = conjuncts
+            sentence.cached_hash = hash(
+                ("and", tuple(hash(conjunct) for conjunct in conjuncts))
+            )
+            sentence.cached_symbols = frozenset().union(
+                *[conjunct.cached_symbols for conjunct in conjuncts]
+            )
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __reduce__(self):
+        return (And, self.conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and hash(self) == hash(other)
+            and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return self.cached_hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +249,91 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """
+        Sentences are shared and never change, so a conjunct can't be added
+        in place: build And(*knowledge.conjuncts, conjunct) instead, or
+        collect the knowledge in a KnowledgeBase.
+        """
+        raise TypeError(
+            "And is immutable: use And(*knowledge.conjuncts, sentence) "
+            "or KnowledgeBase.add(sentence) instead"
+        )
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
+        if not self.conjuncts:
+            return "⊤"
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set(self.cached_symbols)
+
+    def children(self):
+        return self.conjuncts
+
+    def compile_expression(self, index, shared=None):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            Sentence.compile_operand(conjunct, index, shared)
+            for conjunct in self.conjuncts
+        ) + ")"
+
+    def compile_bitwise_expression(self, index, shared=None):
+        if not self.conjuncts:
+            return "full"
+        return "(" + " & ".join(
+            Sentence.compile_bitwise_operand(conjunct, index, shared)
+            for conjunct in self.conjuncts
+        ) + ")"
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        key = (cls,) + tuple(id(disjunct) for disjunct in disjuncts)
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = super().__new__(cls)
+            sentence.disjuncts = disjuncts
+            sentence.cached_hash = hash(
+                ("or", tuple(hash(disjunct) for disjunct in disjuncts))
+            )
+            sentence.cached_symbols = frozenset().union(
+                *[disjunct.cached_symbols for disjunct in disjuncts]
+            )
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and hash(self) == hash(other)
+            and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self.cached_hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +342,79 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
+        if not self.disjuncts:
+            return "⊥"
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set(self.cached_symbols)
+
+    def children(self):
+        return self.disjuncts
+
+    def compile_expression(self, index, shared=None):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            Sentence.compile_operand(disjunct, index, shared)
+            for disjunct in self.disjuncts
+        ) + ")"
+
+    def compile_bitwise_expression(self, index, shared=None):
+        if not self.disjuncts:
+            return "0"
+        return "(" + " | ".join(
+            Sentence.compile_bitwise_operand(disjunct, index, shared)
+            for disjunct in self.disjuncts
+        ) + ")"
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        key = (cls, id(antecedent), id(consequent))
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = super().__new__(cls)
+            sentence.antecedent = antecedent
+            sentence.consequent = consequent
+            sentence.cached_hash = hash(
+                ("implies", hash(antecedent), hash(consequent))
+            )
+            sentence.cached_symbols = (antecedent.cached_symbols
+                                       | consequent.cached_symbols)
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication) and hash(self) == hash(other)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self.cached_hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,38 +423,85 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return set(self.cached_symbols)
+
+    def children(self):
+        return (self.antecedent, self.consequent)
+
+    def compile_expression(self, index, shared=None):
+        antecedent = Sentence.compile_operand(self.antecedent, index, shared)
+        consequent = Sentence.compile_operand(self.consequent, index, shared)
+        return f"(not {antecedent} or {consequent})"
+
+    def compile_bitwise_expression(self, index, shared=None):
+        antecedent = Sentence.compile_bitwise_operand(self.antecedent, index, shared)
+        consequent = Sentence.compile_bitwise_operand(self.consequent, index, shared)
+        return f"((full ^ {antecedent}) | {consequent})"
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        key = (cls, id(left), id(right))
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = super().__new__(cls)
+            sentence.left = left
+            sentence.right = right
+            sentence.cached_hash = hash(
+                ("biconditional", hash(left), hash(right))
+            )
+            sentence.cached_symbols = left.cached_symbols | right.cached_symbols
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional) and hash(self) == hash(other)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self.cached_hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
+
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
@@ -222,42 +509,767 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return set(self.cached_symbols)
 
+    def children(self):
+        return (self.left, self.right)
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def compile_expression(self, index, shared=None):
+        left = Sentence.compile_operand(self.left, index, shared)
+        right = Sentence.compile_operand(self.right, index, shared)
+        return f"({left} == {right})"
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
+    def compile_bitwise_expression(self, index, shared=None):
+        left = Sentence.compile_bitwise_operand(self.left, index, shared)
+        right = Sentence.compile_bitwise_operand(self.right, index, shared)
+        return f"(full ^ {left} ^ {right})"
 
-        # If model has an assignment for each symbol
-        if not symbols:
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
+def check_all(knowledge, query, symbols, model):
+    """Checks if knowledge base entails query, given a particular model."""
+
+    # If the knowledge base is already false, no completion of the model
+    # can be a counterexample
+    knowledge_value = knowledge.evaluate_partial(model)
+    if knowledge_value is False:
+        return True
+
+    # If the query is already true, it holds in every completion
+    query_value = query.evaluate_partial(model)
+    if query_value is True:
+        return True
+
+    # If knowledge base is true in model, then query must also be true
+    # (once every symbol is assigned, one of these cases always applies)
+    if knowledge_value is True and query_value is False:
+        return False
+    else:
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+        # Choose one of the remaining unused symbols
+        remaining = symbols.copy()
+        p = remaining.pop()
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+        # Create a model where the symbol is true
+        model_true = model.copy()
+        model_true[p] = True
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+        # Create a model where the symbol is false
+        model_false = model.copy()
+        model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+        # Ensure entailment holds in both models
+        return (check_all(knowledge, query, remaining, model_true) and
+                check_all(knowledge, query, remaining, model_false))
+
+
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
 
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def check_partition(knowledge, query, symbols, prefix, values):
+    """
+    Checks if knowledge base entails query in the models where the
+    `prefix` symbols have the given truth `values`.
+    """
+    model = dict(zip(prefix, values))
+    return check_all(knowledge, query, set(symbols) - set(prefix), model)
+
+
+def model_check_parallel(knowledge, query, prefix_size=4, processes=None):
+    """
+    Checks if knowledge base entails query, like model_check, splitting the
+    models on the values of the first `prefix_size` symbols and checking
+    each part in a pool of `processes` workers (all cores by default).
+    All workers stop as soon as one of them finds a counterexample.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    prefix = symbols[:prefix_size]
+    tasks = [
+        (knowledge, query, symbols, prefix, values)
+        for values in itertools.product((True, False), repeat=len(prefix))
+    ]
+
+    # Leaving the pool terminates the workers still running
+    with multiprocessing.Pool(processes) as pool:
+        for entailed in pool.imap_unordered(check_partition_task, tasks):
+            if not entailed:
+                return False
+    return True
+
+
+def check_partition_task(task):
+    """Unpacks a model_check_parallel task for check_partition."""
+    return check_partition(*task)
+
+
+# Number of symbols enumerated inside one bitwise block
+# (each block holds 2 ** BLOCK_SYMBOLS models as the bits of a Python int)
+BLOCK_SYMBOLS = 12
+
+
+def shared_subsentences(sentence):
+    """
+    Returns the compound subsentences appearing more than once in sentence,
+    each one listed after the shared subsentences it contains.
+    """
+    counts = dict()
+
+    def count(sentence):
+        counts[sentence] = counts.get(sentence, 0) + 1
+        # The parts of a repeated subsentence were already counted
+        if counts[sentence] == 1:
+            for child in sentence.children():
+                count(child)
+
+    shared = []
+
+    def collect(sentence):
+        if counts[sentence] == 0:
+            return
+        for child in sentence.children():
+            collect(child)
+        if counts[sentence] > 1 and sentence.children():
+            shared.append(sentence)
+        counts[sentence] = 0
+
+    count(sentence)
+    collect(sentence)
+    return shared
+
+
+def compile_function(sentence, symbols, arguments, compile_operand):
+    """
+    Returns a function of `arguments` evaluating sentence, where every
+    shared subsentence is computed only once, into a local variable.
+    """
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    shared = dict()
+    lines = [f"def evaluator({arguments}):"]
+    for i, subsentence in enumerate(shared_subsentences(sentence)):
+        lines.append(f"    s{i} = {compile_operand(subsentence, index, shared)}")
+        shared[subsentence] = f"s{i}"
+    lines.append(f"    return {compile_operand(sentence, index, shared)}")
+
+    namespace = dict()
+    exec("\n".join(lines), namespace)
+    return namespace["evaluator"]
+
+
+def compile_sentence(sentence, symbols=None):
+    """
+    Compiles a sentence into a function of a single model, given as a
+    sequence of booleans in the order of `symbols` (all symbols of the
+    sentence, sorted by name, if not given). Subsentences that appear
+    several times are only evaluated once per model.
+    Returns the function together with the list of symbols it expects.
+    """
+    if symbols is None:
+        symbols = sorted(sentence.symbols())
+    evaluator = compile_function(
+        sentence, symbols, "model", Sentence.compile_operand
+    )
+    return evaluator, list(symbols)
+
+
+def model_check_compiled(knowledge, query):
+    """
+    Checks if knowledge base entails query, like model_check, but compiles
+    both sentences first and enumerates models as tuples of booleans.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge_evaluator, _ = compile_sentence(knowledge, symbols)
+    query_evaluator, _ = compile_sentence(query, symbols)
+
+    # Look for a model where the knowledge base holds but the query doesn't
+    for model in itertools.product((True, False), repeat=len(symbols)):
+        if knowledge_evaluator(model) and not query_evaluator(model):
+            return False
+    return True
+
+
+def compile_bitwise_sentence(sentence, symbols=None):
+    """
+    Compiles a sentence into a function of `masks` and `full` evaluating it
+    on a whole block of models at once (see compile_bitwise_expression).
+    Subsentences that appear several times are only evaluated once per block.
+    Returns the function together with the list of symbols it expects.
+    """
+    if symbols is None:
+        symbols = sorted(sentence.symbols())
+    evaluator = compile_function(
+        sentence, symbols, "masks, full", Sentence.compile_bitwise_operand
+    )
+    return evaluator, list(symbols)
+
+
+def symbol_masks(count):
+    """
+    Returns the masks of the first `count` symbols over a block of
+    2 ** count models, where bit m of mask i is bit i of m.
+    """
+    size = 2 ** count
+    masks = []
+    for i in range(count):
+        width = 2 ** (i + 1)
+        mask = ((1 << 2 ** i) - 1) << 2 ** i
+        while width < size:
+            mask |= mask << width
+            width *= 2
+        masks.append(mask)
+    return masks
+
+
+def model_check_bitwise(knowledge, query):
+    """
+    Checks if knowledge base entails query, like model_check, but evaluates
+    blocks of 2 ** BLOCK_SYMBOLS models at a time with bitwise operations.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge_evaluator, _ = compile_bitwise_sentence(knowledge, symbols)
+    query_evaluator, _ = compile_bitwise_sentence(query, symbols)
+
+    # The first symbols change inside a block, the others once per block
+    inner = min(len(symbols), BLOCK_SYMBOLS)
+    outer = len(symbols) - inner
+    full = (1 << 2 ** inner) - 1
+    masks = symbol_masks(inner) + [0] * outer
+
+    for block in range(2 ** outer):
+        for j in range(outer):
+            masks[inner + j] = full if (block >> j) & 1 else 0
+
+        # Any model where the knowledge base holds but the query doesn't?
+        if knowledge_evaluator(masks, full) & (full ^ query_evaluator(masks, full)):
+            return False
+    return True
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form over integer variables, built from
+    sentences with the Tseitin encoding. A literal is `v` or `-v` for
+    variable `v`, and each clause is a list of literals.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.count = 0
+        self.variables = dict()
+        self.definitions = dict()
+
+    def new_variable(self):
+        """Returns a fresh variable."""
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        """Returns the variable of symbol `name`, creating it if needed."""
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly when `sentence` is, adding
+        the clauses defining it. Repeated subformulas share one literal.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        if isinstance(sentence, And):
+            children = [self.literal(c) for c in sentence.conjuncts]
+            v = self.new_variable()
+            for child in children:
+                self.clauses.append([-v, child])
+            self.clauses.append([v] + [-child for child in children])
+        elif isinstance(sentence, Or):
+            children = [self.literal(d) for d in sentence.disjuncts]
+            v = self.new_variable()
+            for child in children:
+                self.clauses.append([v, -child])
+            self.clauses.append([-v] + children)
+        elif isinstance(sentence, Implication):
+            antecedent = self.literal(sentence.antecedent)
+            consequent = self.literal(sentence.consequent)
+            v = self.new_variable()
+            self.clauses.append([-v, -antecedent, consequent])
+            self.clauses.append([v, antecedent])
+            self.clauses.append([v, -consequent])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            v = self.new_variable()
+            self.clauses.append([-v, -left, right])
+            self.clauses.append([-v, left, -right])
+            self.clauses.append([v, left, right])
+            self.clauses.append([v, -left, -right])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.definitions[sentence] = v
+        return v
+
+    def add(self, sentence):
+        """
+        Adds clauses asserting that `sentence` is true. Top level
+        conjunctions and disjunctions become clauses directly.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+class Solver():
+    """
+    CDCL SAT solver: unit propagation with two watched literals, first UIP
+    clause learning with non chronological backjumping, activity based
+    branching with phase saving, and restarts. Clauses can be added between
+    calls to `solve`, and learnt clauses are kept for the next call.
+    """
+
+    def __init__(self, clauses=(), count=0):
+        self.count = 0
+        self.clauses = []
+        self.watches = {0: []}
+        self.assigns = [0]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.increment = 1.0
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.ensure(count)
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def ensure(self, count):
+        """Makes room for variables up to `count`."""
+        while self.count < count:
+            self.count += 1
+            self.assigns.append(0)
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(False)
+            self.watches[self.count] = []
+            self.watches[-self.count] = []
+
+    def value(self, literal):
+        """Returns 1 if `literal` is true, -1 if false, 0 if unassigned."""
+        value = self.assigns[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        """
+        Adds a clause. Returns False if the clauses are now known to be
+        unsatisfiable, True otherwise.
+        """
+        self.backtrack(0)
+        if not self.ok:
+            return False
+        clause = list(dict.fromkeys(clause))
+        self.ensure(max((abs(literal) for literal in clause), default=0))
+
+        # Skip tautologies and clauses already satisfied at the top level,
+        # and drop literals that are already false there
+        literals = set(clause)
+        if any(-literal in literals for literal in clause):
+            return True
+        if any(self.value(literal) == 1 for literal in clause):
+            return True
+        clause = [literal for literal in clause if self.value(literal) == 0]
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            if self.propagate() is not None:
+                self.ok = False
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        """Watches the first two literals of a clause."""
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def enqueue(self, literal, reason):
+        """Makes `literal` true at the current decision level."""
+        v = abs(literal)
+        self.assigns[v] = 1 if literal > 0 else -1
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Propagates every unit clause. Returns a conflicting clause, or None
+        if there is no conflict.
+        """
+        while self.qhead < len(self.trail):
+            false_literal = -self.trail[self.qhead]
+            self.qhead += 1
+            watching = self.watches[false_literal]
+            self.watches[false_literal] = kept = []
+
+            for i, clause in enumerate(watching):
+                # Keep the false literal in the second position
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if self.value(first) == 1:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(first) == -1:
+                        kept.extend(watching[i + 1:])
+                        self.qhead = len(self.trail)
+                        return clause
+                    self.enqueue(first, clause)
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first UIP clause learnt from a conflict (asserting
+        literal first) and the level to backjump to.
+        """
+        learnt = [0]
+        seen = set()
+        counter = 0
+        p = 0
+        clause = conflict
+        index = len(self.trail) - 1
+        level = len(self.trail_lim)
+
+        while True:
+            for q in clause:
+                v = abs(q)
+                if q == p or v in seen or self.level[v] == 0:
+                    continue
+                seen.add(v)
+                self.bump(v)
+                if self.level[v] == level:
+                    counter += 1
+                else:
+                    learnt.append(q)
+
+            # Walk back the trail to the next literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            p = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.reason[abs(p)]
+        learnt[0] = -p
+
+        if len(learnt) == 1:
+            return learnt, 0
+        highest = max(range(1, len(learnt)),
+                      key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump(self, v):
+        """Raises the activity of a variable involved in a conflict."""
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def backtrack(self, level):
+        """Undoes every assignment above decision level `level`."""
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            v = abs(literal)
+            self.phase[v] = literal > 0
+            self.assigns[v] = 0
+            self.reason[v] = None
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def pick_branch(self):
+        """Returns the next decision literal, or 0 if all are assigned."""
+        best = 0
+        for v in range(1, self.count + 1):
+            if self.assigns[v] == 0 and (
+                best == 0 or self.activity[v] > self.activity[best]
+            ):
+                best = v
+        if best == 0:
+            return 0
+        return best if self.phase[best] else -best
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses (and the `assumptions` literals) can all
+        be satisfied, storing a satisfying model in `self.model`, and False
+        otherwise.
+        """
+        self.model = None
+        self.backtrack(0)
+        if not self.ok:
+            return False
+        self.ensure(max((abs(literal) for literal in assumptions), default=0))
+
+        restart_limit = 100
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.attach(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.increment /= 0.95
+                continue
+
+            if conflicts >= restart_limit:
+                conflicts = 0
+                restart_limit = int(restart_limit * 1.5)
+                self.backtrack(0)
+                continue
+
+            # Decide the assumptions first, one per level
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                decision = assumptions[level]
+                if self.value(decision) == 1:
+                    self.trail_lim.append(len(self.trail))
+                    continue
+                if self.value(decision) == -1:
+                    self.backtrack(0)
+                    return False
+            else:
+                decision = self.pick_branch()
+                if decision == 0:
+                    self.model = [value == 1 for value in self.assigns]
+                    self.backtrack(0)
+                    return True
+
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(decision, None)
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, like model_check, by asking a
+    SAT solver whether knowledge together with the negated query has a model.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return not Solver(cnf.clauses, cnf.count).solve()
+
+
+class KnowledgeBase():
+    """
+    Knowledge base answering many entailment queries with one SAT solver.
+    The knowledge is encoded once, and adding a sentence only adds its
+    clauses to the solver, which keeps everything it has learnt so far.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.added = 0
+        self.answers = dict()
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.cnf.add(sentence)
+        self.flush()
+
+        # Answers may change once the knowledge grows
+        self.answers = dict()
+
+    def flush(self):
+        """Passes clauses the solver hasn't seen yet on to it."""
+        for clause in self.cnf.clauses[self.added:]:
+            self.solver.add_clause(clause)
+        self.added = len(self.cnf.clauses)
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        if query not in self.answers:
+            # The knowledge entails query if it has no model where query is false
+            literal = self.cnf.literal(query)
+            self.flush()
+            self.answers[query] = not self.solver.solve([-literal])
+        return self.answers[query]
+
+
+# Simplification
+# An empty And is always true, and an empty Or always false, so they are
+# used as the constants true and false.
+
+def is_true(sentence):
+    """Returns True if sentence is the constant true (an empty And)."""
+    return isinstance(sentence, And) and not sentence.conjuncts
+
+
+def is_false(sentence):
+    """Returns True if sentence is the constant false (an empty Or)."""
+    return isinstance(sentence, Or) and not sentence.disjuncts
+
+
+def negation_normal_form(sentence, positive=True):
+    """
+    Returns an equivalent sentence (or of its negation, if `positive` is
+    False) using only And, Or and negated symbols, with implications and
+    biconditionals rewritten and negations pushed down to the symbols.
+    """
+    if isinstance(sentence, Symbol):
+        return sentence if positive else Not(sentence)
+    if isinstance(sentence, Not):
+        return negation_normal_form(sentence.operand, not positive)
+    if isinstance(sentence, And):
+        children = [negation_normal_form(c, positive) for c in sentence.conjuncts]
+        return And(*children) if positive else Or(*children)
+    if isinstance(sentence, Or):
+        children = [negation_normal_form(d, positive) for d in sentence.disjuncts]
+        return Or(*children) if positive else And(*children)
+    if isinstance(sentence, Implication):
+        if positive:
+            return Or(negation_normal_form(sentence.antecedent, False),
+                      negation_normal_form(sentence.consequent, True))
+        return And(negation_normal_form(sentence.antecedent, True),
+                   negation_normal_form(sentence.consequent, False))
+    if isinstance(sentence, Biconditional):
+        left = negation_normal_form(sentence.left, True)
+        not_left = negation_normal_form(sentence.left, False)
+        right = negation_normal_form(sentence.right, True)
+        not_right = negation_normal_form(sentence.right, False)
+        if positive:
+            return And(Or(not_left, right), Or(left, not_right))
+        return And(Or(left, right), Or(not_left, not_right))
+    raise TypeError("must be a logical sentence")
+
+
+def fold(sentence):
+    """
+    Simplifies a sentence in negation normal form: flattens nested And/Or,
+    folds constants, removes duplicates, detects complementary literals,
+    and drops conjuncts (disjuncts) subsumed by another one.
+    """
+    if not isinstance(sentence, (And, Or)):
+        return sentence
+    conjunction = isinstance(sentence, And)
+    same = And if conjunction else Or
+    absorbing = is_false if conjunction else is_true
+
+    # Flatten nested sentences of the same kind and drop duplicates
+    children = []
+    for child in map(fold, sentence.children()):
+        if absorbing(child):
+            return child
+        parts = child.children() if isinstance(child, same) else [child]
+        for part in parts:
+            if part not in children:
+                children.append(part)
+
+    # x ∧ ¬x is false, x ∨ ¬x is true
+    present = set(children)
+    for child in children:
+        if isinstance(child, Not) and child.operand in present:
+            return Or() if conjunction else And()
+
+    # Subsumption: (a ∨ b) ∧ (a ∨ b ∨ c) = a ∨ b, and a ∨ (a ∧ b) = a
+    # (this also drops repeats written in another order, like b ∨ a)
+    other = Or if conjunction else And
+    parts = [
+        frozenset(child.children()) if isinstance(child, other)
+        else frozenset([child])
+        for child in children
+    ]
+    children = [
+        child for i, child in enumerate(children)
+        if not any(parts[j] < parts[i] or (parts[j] == parts[i] and j < i)
+                   for j in range(len(children)))
+    ]
+
+    if len(children) == 1:
+        return children[0]
+    return same(*children)
+
+
+def conjunctive_normal_form(sentence):
+    """
+    Returns an equivalent sentence in conjunctive normal form: a conjunction
+    of disjunctions of (possibly negated) symbols. Distributing Or over And
+    can make the sentence exponentially larger.
+    """
+    sentence = fold(negation_normal_form(sentence))
+
+    def clauses(sentence):
+        """Returns the clauses of a sentence in negation normal form."""
+        if isinstance(sentence, And):
+            return [clause for c in sentence.conjuncts for clause in clauses(c)]
+        if isinstance(sentence, Or):
+            result = [[]]
+            for disjunct in sentence.disjuncts:
+                result = [clause + other
+                          for clause in result for other in clauses(disjunct)]
+            return result
+        return [[sentence]]
+
+    return fold(And(*[Or(*clause) for clause in clauses(sentence)]))
+
+
+def simplify(sentence, cnf=False):
+    """
+    Returns an equivalent, usually smaller, sentence: rewritten into negation
+    normal form, then flattened, constant folded and subsumption reduced.
+    If `cnf` is True, the result is also put in conjunctive normal form.
+    """
+    if cnf:
+        return conjunctive_normal_form(sentence)
+    return fold(negation_normal_form(sentence))
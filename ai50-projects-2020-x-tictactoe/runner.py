@@ -1,5 +1,6 @@
 import pygame
 import sys
+import threading
 import time
 
 import tictactoe as ttt
@@ -17,14 +18,52 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Minimum time the computer "thinks" before playing, in seconds
+AI_DELAY = 0.5
+
+
+def start_ai_search(board):
+    """
+    Start computing the AI move for `board` on a background thread.
+    The returned search is polled each frame, and can be cancelled
+    by setting its "cancel" event.
+    """
+    search = {
+        "move": None,
+        "done": False,
+        "started": time.time(),
+        "cancel": threading.Event()
+    }
+
+    def run():
+        try:
+            search["move"] = ttt.minimax(board, cancel=search["cancel"])
+            search["done"] = True
+        except ttt.SearchCancelled:
+            pass
+
+    threading.Thread(target=run, daemon=True).start()
+    return search
+
+
+def cancel_ai_search(search):
+    """
+    Stop a running AI search, if there is one.
+    """
+    if search is not None:
+        search["cancel"].set()
+
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_search = None
+clock = pygame.time.Clock()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai_search(ai_search)
             sys.exit()
 
     screen.fill(black)
@@ -108,15 +147,13 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move (computed in the background so the window stays responsive)
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_search is None:
+                ai_search = start_ai_search(board)
+            elif ai_search["done"] and time.time() - ai_search["started"] >= AI_DELAY:
+                board = ttt.result(board, ai_search["move"])
+                ai_search = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,6 +164,24 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
+        # Let the user reset the game at any time, cancelling the AI search
+        if not game_over:
+            resetButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+            reset = mediumFont.render("Reset", True, black)
+            resetRect = reset.get_rect()
+            resetRect.center = resetButton.center
+            pygame.draw.rect(screen, white, resetButton)
+            screen.blit(reset, resetRect)
+            click, _, _ = pygame.mouse.get_pressed()
+            if click == 1:
+                mouse = pygame.mouse.get_pos()
+                if resetButton.collidepoint(mouse):
+                    time.sleep(0.2)
+                    cancel_ai_search(ai_search)
+                    ai_search = None
+                    user = None
+                    board = ttt.initial_state()
+
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
             again = mediumFont.render("Play Again", True, black)
@@ -139,8 +194,12 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    cancel_ai_search(ai_search)
+                    ai_search = None
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
 
     pygame.display.flip()
+
+    # Don't spin faster than needed, leave the CPU to the AI search
+    clock.tick(60)
@@ -4,12 +4,23 @@ Tic Tac Toe Player
 
 import math
 import copy
+import multiprocessing
 
 X = "X"
 O = "O"
 EMPTY = None
 
 
+class SearchCancelled(Exception):
+    """
+    Raised when a search is cancelled before it finishes.
+    """
+
+
+# number of boards the searches looked at (used by the benchmark harness)
+nodesSearched = 0
+
+
 def initial_state():
     """
     Returns starting state of the board.
@@ -120,31 +131,206 @@ def utility(board):
     else:
         return 0
 
-def calcMaxValue(board):
+def calcMaxValue(board, cancel=None):
+    global nodesSearched
+    nodesSearched += 1
+    if cancel is not None and cancel.is_set():
+        raise SearchCancelled()
     if terminal(board):
         return utility(board)
 
     res = -math.inf
     for action in actions(board):
-        res = max(res, calcMinValue(result(board, action)))
+        res = max(res, calcMinValue(result(board, action), cancel))
 
     return res
 
 
-def calcMinValue(board):
+def calcMinValue(board, cancel=None):
+    global nodesSearched
+    nodesSearched += 1
+    if cancel is not None and cancel.is_set():
+        raise SearchCancelled()
     if terminal(board):
         return utility(board)
 
     res = math.inf
     for action in actions(board):
-        res = min(res, calcMaxValue(result(board, action)))
+        res = min(res, calcMaxValue(result(board, action), cancel))
+
+    return res
+
+def calcAlphaBetaMaxValue(board, alpha, beta, depth=0):
+    """
+    Returns the value of the board for the maximizing player (X), looking only
+    inside the closed window [alpha, beta].
+    Values inside the window are exact, values outside it are only bounds.
+    `depth` is how many plies below the root action the board is. In a
+    parallelMinimax worker, the first SHARED_BOUND_DEPTH plies also narrow the
+    window with the best root value found by any worker.
+    """
+    global nodesSearched
+    nodesSearched += 1
+    if terminal(board):
+        return utility(board)
+
+    res = -math.inf
+    for action in actions(board):
+        if depth < SHARED_BOUND_DEPTH:
+            alpha, beta = readSharedBound(alpha, beta)
+        res = max(res, calcAlphaBetaMinValue(result(board, action), alpha, beta, depth + 1))
+        # O already has a better option elsewhere, it will never let us get here
+        if res > beta:
+            return res
+        alpha = max(alpha, res)
 
     return res
 
-def minimax(board):
+
+def calcAlphaBetaMinValue(board, alpha, beta, depth=0):
+    """
+    Returns the value of the board for the minimizing player (O), looking only
+    inside the closed window [alpha, beta].
+    Values inside the window are exact, values outside it are only bounds.
+    `depth` is used like in calcAlphaBetaMaxValue.
+    """
+    global nodesSearched
+    nodesSearched += 1
+    if terminal(board):
+        return utility(board)
+
+    res = math.inf
+    for action in actions(board):
+        if depth < SHARED_BOUND_DEPTH:
+            alpha, beta = readSharedBound(alpha, beta)
+        res = min(res, calcAlphaBetaMaxValue(result(board, action), alpha, beta, depth + 1))
+        # X already has a better option elsewhere, it will never let us get here
+        if res < alpha:
+            return res
+        beta = min(beta, res)
+
+    return res
+
+
+# best root value found so far, shared between the worker processes (from the
+# point of view of the player to move at the root, so higher is always better)
+sharedBound = None
+
+# player to move at the root of the search a worker is running (None outside workers)
+rootPlayer = None
+
+# the workers check the shared bound for new values this many plies down their search
+SHARED_BOUND_DEPTH = 4
+
+
+def initRootWorker(bound):
+    global sharedBound
+    sharedBound = bound
+
+
+def readSharedBound(alpha, beta):
+    """
+    Returns the window [alpha, beta] narrowed with the best root value any
+    worker found so far (moves that can't reach it don't need an exact value).
+    """
+    if rootPlayer == X:
+        return max(alpha, sharedBound.value), beta
+    elif rootPlayer == O:
+        return alpha, min(beta, -sharedBound.value)
+    return alpha, beta
+
+
+def evaluateRootAction(board, action):
+    """
+    Returns the value of playing `action` on the board, pruned against the best
+    value any worker found so far (the value is exact if it can still be the best),
+    and the number of boards the worker looked at to find it.
+    """
+    global rootPlayer
+    rootPlayer = player(board)
+    nodesBefore = nodesSearched
+    alpha, beta = readSharedBound(-math.inf, math.inf)
+    if rootPlayer == X:
+        value = calcAlphaBetaMinValue(result(board, action), alpha, beta)
+        score = value
+    else:
+        value = calcAlphaBetaMaxValue(result(board, action), alpha, beta)
+        score = -value
+
+    with sharedBound.get_lock():
+        if score > sharedBound.value:
+            sharedBound.value = score
+
+    return value, nodesSearched - nodesBefore
+
+
+def rootPool(processes=None):
+    """
+    Returns a pool of `processes` workers (all cores by default) that
+    parallelMinimax can reuse for every move.
+    """
+    global sharedBound
+    if sharedBound is None:
+        sharedBound = multiprocessing.Value("d", -math.inf)
+    return multiprocessing.Pool(processes, initializer=initRootWorker, initargs=(sharedBound,))
+
+
+def parallelMinimax(board, processes=None, pool=None):
+    """
+    Returns the same action as minimax, but evaluates each root action in its
+    own worker process. The workers share the best root value found so far,
+    so moves that can't beat it are cut off early.
+    `pool` should come from rootPool; without it, a pool is made for this move only.
+    """
+    if terminal(board):
+        return None
+
+    if pool is None:
+        with rootPool(processes) as pool:
+            return parallelMinimax(board, pool=pool)
+
+    moves = list(actions(board))
+    sharedBound.value = -math.inf
+    results = pool.starmap(evaluateRootAction, [(board, action) for action in moves], chunksize=1)
+    values = [value for value, _ in results]
+
+    # the workers count their boards in their own processes, so add them up here
+    global nodesSearched
+    nodesSearched += sum(nodes for _, nodes in results)
+
+    # pick the first best action in the same order minimax looks at them,
+    # pruned actions are strictly worse than the bound so they never win
+    bestaction = None
+    if player(board) == X:
+        res = -math.inf
+        for action, value in zip(moves, values):
+            if value > res:
+                res = value
+                bestaction = action
+    else:
+        res = math.inf
+        for action, value in zip(moves, values):
+            if value < res:
+                res = value
+                bestaction = action
+
+    return bestaction
+
+
+def minimax(board, parallel=False, processes=None, cancel=None, pool=None):
     """
     Returns the optimal action for the current player on the board.
+    If `parallel` is True, the root actions are split across a pool of
+    `processes` workers (all cores by default), or across `pool` if given
+    (see rootPool).
+    If `cancel` is given (a threading.Event), the search raises SearchCancelled
+    as soon as it is set. Parallel searches can't be cancelled.
     """
+    if parallel:
+        if cancel is not None:
+            raise ValueError("a parallel search can't be cancelled")
+        return parallelMinimax(board, processes, pool)
+
     if terminal(board):
         return None
     else:
@@ -158,7 +344,7 @@ def minimax(board):
             res = -math.inf
             for action in actions(board):
                 # for each action, get the min result value (because its X player)
-                bestres = calcMinValue(result(board, action))
+                bestres = calcMinValue(result(board, action), cancel)
                 if bestres > res: # if higher found, use it as the new highest
                     res = bestres
                     bestaction = action
@@ -167,10 +353,37 @@ def minimax(board):
             res = math.inf
             for action in actions(board):
                 #for each action, get the max result value (because its O player)
-                bestres = calcMaxValue(result(board, action))
+                bestres = calcMaxValue(result(board, action), cancel)
                 if bestres < res: # if lower found, use it as the new lowest
                     res = bestres
                     bestaction = action
 
         return bestaction
 
+
+def alphabeta(board):
+    """
+    Returns the same action as minimax, using alpha-beta pruning.
+    """
+    if terminal(board):
+        return None
+
+    bestaction = None
+    if player(board) == X:
+        res = -math.inf
+        for action in actions(board):
+            # children that can only tie the best value are still searched exactly,
+            # so the first best action wins just like in minimax
+            bestres = calcAlphaBetaMinValue(result(board, action), res, math.inf)
+            if bestres > res:
+                res = bestres
+                bestaction = action
+    else:
+        res = math.inf
+        for action in actions(board):
+            bestres = calcAlphaBetaMaxValue(result(board, action), -math.inf, res)
+            if bestres < res:
+                res = bestres
+                bestaction = action
+
+    return bestaction
@@ -0,0 +1,195 @@
+"""
+Headless self-play tournament and benchmark for the tic tac toe engine
+"""
+
+import math
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+# agents that always play a perfect move (and should all agree on it)
+PERFECT_AGENTS = ["minimax", "alphabeta", "parallel", "table"]
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [4, 5] or (len(sys.argv) == 5 and sys.argv[4] != "verify"):
+        sys.exit("Usage: python tournament.py games playerX playerO [verify]")
+    games = int(sys.argv[1])
+    names = {ttt.X: sys.argv[2], ttt.O: sys.argv[3]}
+    verify = len(sys.argv) == 5
+    for name in names.values():
+        if name not in AGENTS:
+            sys.exit(f"Unknown agent {name}, choose from: {', '.join(AGENTS)}")
+
+    agents = {mark: AGENTS[name]() for mark, name in names.items()}
+    stats = {mark: {"nodes": [], "latency": []} for mark in agents}
+    outcomes = {ttt.X: 0, ttt.O: 0, None: 0}
+    checked = dict()
+
+    for _ in range(games):
+        board = ttt.initial_state()
+        while not ttt.terminal(board):
+            mark = ttt.player(board)
+            if verify and names[mark] in PERFECT_AGENTS:
+                check_agreement(board, checked)
+
+            ttt.nodesSearched = 0
+            start = time.perf_counter()
+            action = agents[mark](board)
+            stats[mark]["latency"].append(time.perf_counter() - start)
+            stats[mark]["nodes"].append(ttt.nodesSearched)
+
+            board = ttt.result(board, action)
+        outcomes[ttt.winner(board)] += 1
+
+    # Print results
+    print(f"Games: {games}")
+    print(f"  X ({names[ttt.X]}) wins: {outcomes[ttt.X]}")
+    print(f"  O ({names[ttt.O]}) wins: {outcomes[ttt.O]}")
+    print(f"  Ties: {outcomes[None]}")
+    for mark in agents:
+        nodes = stats[mark]["nodes"]
+        latency = sorted(stats[mark]["latency"])
+        print(f"{mark} ({names[mark]}):")
+        print(f"  Moves: {len(nodes)}")
+        print(f"  Nodes per move: {sum(nodes) / len(nodes):.1f} (max {max(nodes)})")
+        print("  Latency per move: " + ", ".join(
+            f"p{p} {percentile(latency, p) * 1000:.3f}ms" for p in [50, 90, 99, 100]
+        ))
+
+    if verify:
+        disagreements = [key for key, agree in checked.items() if not agree]
+        print(f"Verified positions: {len(checked)}, disagreements: {len(disagreements)}")
+        for key in disagreements:
+            print(f"  {key}")
+        if disagreements:
+            sys.exit(1)
+
+
+def random_agent():
+    """
+    Returns an agent that plays a random legal move.
+    """
+    rng = random.Random(0)
+
+    def play(board):
+        return rng.choice(sorted(ttt.actions(board)))
+    return play
+
+
+def minimax_agent():
+    """
+    Returns an agent that plays tictactoe.minimax.
+    """
+    return ttt.minimax
+
+
+def alphabeta_agent():
+    """
+    Returns an agent that plays tictactoe.alphabeta.
+    """
+    return ttt.alphabeta
+
+
+def parallel_agent():
+    """
+    Returns an agent that plays tictactoe.minimax in parallel, reusing the
+    same pool of workers for every move.
+    """
+    pool = ttt.rootPool()
+
+    def play(board):
+        return ttt.minimax(board, parallel=True, pool=pool)
+    return play
+
+
+def table_agent():
+    """
+    Returns an agent that looks its move up in a table of every reachable
+    position, built once up front.
+    """
+    table = build_table()
+
+    def play(board):
+        return table[board_key(board)]
+    return play
+
+
+AGENTS = {
+    "random": random_agent,
+    "minimax": minimax_agent,
+    "alphabeta": alphabeta_agent,
+    "parallel": parallel_agent,
+    "table": table_agent
+}
+
+
+def board_key(board):
+    """
+    Returns a hashable version of the board.
+    """
+    return tuple(tuple(row) for row in board)
+
+
+def build_table():
+    """
+    Returns a dictionary mapping every reachable non terminal board to the
+    action minimax would choose on it (the first action with the best value).
+    """
+    values = dict()
+    table = dict()
+
+    def value(board):
+        key = board_key(board)
+        if key in values:
+            return values[key]
+        if ttt.terminal(board):
+            values[key] = ttt.utility(board)
+            return values[key]
+
+        maximizing = ttt.player(board) == ttt.X
+        res = -math.inf if maximizing else math.inf
+        for action in ttt.actions(board):
+            childres = value(ttt.result(board, action))
+            if (maximizing and childres > res) or (not maximizing and childres < res):
+                res = childres
+                table[key] = action
+        values[key] = res
+        return res
+
+    value(ttt.initial_state())
+    return table
+
+
+def check_agreement(board, checked):
+    """
+    Make sure every perfect play agent picks the same move on the board,
+    checking each position only once.
+    """
+    key = board_key(board)
+    if key in checked:
+        return
+    moves = set(AGENT_CACHE.setdefault(name, AGENTS[name]())(board) for name in PERFECT_AGENTS)
+    checked[key] = len(moves) == 1
+
+
+# agents used to verify positions, built the first time they're needed
+AGENT_CACHE = dict()
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile (nearest rank) of a sorted list of values.
+    """
+    if not values:
+        return 0
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+if __name__ == "__main__":
+    main()